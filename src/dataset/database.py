@@ -5,10 +5,131 @@ SQLite wrapper with schema for detections, videos, and model metrics.
 
 import sqlite3
 import json
-from datetime import datetime
-from typing import List, Dict, Optional, Any
+import threading
+from typing import List, Dict, Optional, Any, Iterator, Sequence
 from pathlib import Path
 
+import pandas as pd
+
+_FETCH_BATCH_SIZE = 256
+
+_DETECTION_COLUMNS = (
+    "id", "video_id", "frame_number", "timestamp", "product_id",
+    "product_name", "product_category", "confidence", "location_branch",
+    "day_of_week", "hour_of_day", "date",
+    "sticker_x", "sticker_y", "sticker_w", "sticker_h",
+    "product_x", "product_y", "product_w", "product_h",
+    "frame_path"
+)
+
+# Bounding boxes are stored as one REAL column per coordinate
+_BBOX_KEYS = ("x", "y", "w", "h")
+_BBOX_COLUMNS = tuple(
+    f"{prefix}_{key}" for prefix in ("sticker", "product") for key in _BBOX_KEYS
+)
+
+# Hot-path statements kept as fixed strings so sqlite3's per-connection
+# statement cache can reuse the compiled form across calls.
+_INSERT_DETECTION_SQL = """
+    INSERT INTO detections (
+        video_id, frame_number, product_id, product_name, 
+        product_category, confidence, location_branch,
+        day_of_week, hour_of_day, date,
+        sticker_x, sticker_y, sticker_w, sticker_h,
+        product_x, product_y, product_w, product_h, frame_path
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_DETECTIONS_JSON_SQL = """
+    INSERT INTO detections (
+        video_id, frame_number, product_id, product_name, 
+        product_category, confidence, location_branch,
+        day_of_week, hour_of_day, date,
+        sticker_x, sticker_y, sticker_w, sticker_h,
+        product_x, product_y, product_w, product_h, frame_path
+    )
+    SELECT
+        json_extract(j.value, '$.video_id'),
+        json_extract(j.value, '$.frame_number'),
+        json_extract(j.value, '$.product_id'),
+        json_extract(j.value, '$.product_name'),
+        json_extract(j.value, '$.product_category'),
+        json_extract(j.value, '$.confidence'),
+        json_extract(j.value, '$.location_branch'),
+        json_extract(j.value, '$.day_of_week'),
+        json_extract(j.value, '$.hour_of_day'),
+        json_extract(j.value, '$.date'),
+        json_extract(j.value, '$.sticker_bbox.x'),
+        json_extract(j.value, '$.sticker_bbox.y'),
+        json_extract(j.value, '$.sticker_bbox.w'),
+        json_extract(j.value, '$.sticker_bbox.h'),
+        json_extract(j.value, '$.product_bbox.x'),
+        json_extract(j.value, '$.product_bbox.y'),
+        json_extract(j.value, '$.product_bbox.w'),
+        json_extract(j.value, '$.product_bbox.h'),
+        json_extract(j.value, '$.frame_path')
+    FROM json_each(?) AS j
+"""
+
+_INSERT_VIDEO_SQL = """
+    INSERT INTO videos (
+        id, upload_date, branch_location, contributor_id, frame_count
+    ) VALUES (?, CURRENT_TIMESTAMP, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        branch_location = excluded.branch_location,
+        contributor_id = excluded.contributor_id,
+        frame_count = excluded.frame_count
+"""
+
+_MARK_VIDEO_PROCESSED_SQL = "UPDATE videos SET processed = TRUE WHERE id = ?"
+
+_TRAINING_DATA_SQL = """
+    SELECT 
+        product_id, MAX(product_name) as product_name, product_category,
+        day_of_week, hour_of_day, date, location_branch,
+        COUNT(*) as detection_count
+    FROM detections 
+    WHERE date BETWEEN ? AND ?
+    GROUP BY product_id, product_category, day_of_week, hour_of_day, date, location_branch
+    HAVING COUNT(*) >= ?
+    ORDER BY date DESC
+"""
+
+
+def _check_bbox(bbox: Optional[Dict]) -> None:
+    """Raise ValueError unless bbox is empty or a dict with x, y, w and h keys."""
+    if not bbox:
+        return
+    if not isinstance(bbox, dict) or not all(key in bbox for key in _BBOX_KEYS):
+        raise ValueError(
+            f"bbox must be a dict with keys {', '.join(_BBOX_KEYS)}, got {bbox!r}"
+        )
+
+
+def _bbox_params(bbox: Optional[Dict]) -> tuple:
+    """Flatten an {x, y, w, h} bbox dict into its four column values."""
+    _check_bbox(bbox)
+    if not bbox:
+        return (None,) * len(_BBOX_KEYS)
+    return tuple(bbox[key] for key in _BBOX_KEYS)
+
+
+def _pop_bbox(row: Dict, prefix: str) -> Optional[Dict]:
+    """Remove a bbox's coordinate columns from a row and return them as a dict."""
+    bbox = {key: row.pop(f"{prefix}_{key}") for key in _BBOX_KEYS}
+    if all(value is None for value in bbox.values()):
+        return None
+    return bbox
+
+
+def _decode_detection(row: Dict) -> Dict:
+    """Turn the stored bbox columns of a detection row back into dicts."""
+    frame_path = row.pop("frame_path")
+    row["sticker_bbox"] = _pop_bbox(row, "sticker")
+    row["product_bbox"] = _pop_bbox(row, "product")
+    row["frame_path"] = frame_path
+    return row
+
 
 class DatabaseManager:
     """SQLite database manager for the M&S prediction system."""
@@ -16,13 +137,30 @@ class DatabaseManager:
     def __init__(self, db_path: str = "data/detections.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the performance PRAGMAs applied."""
+        # isolation_level=None leaves transactions to explicit BEGIN/COMMIT
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        return conn
+    
     def _init_database(self):
         """Initialize database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
+            # WAL is persistent, so it only needs setting once per database
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
+            cursor.execute("BEGIN IMMEDIATE")
+            
             # Store each detection instance
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS detections (
@@ -38,22 +176,74 @@ class DatabaseManager:
                     day_of_week INTEGER,
                     hour_of_day INTEGER,
                     date DATE,
-                    sticker_bbox TEXT,
-                    product_bbox TEXT,
+                    sticker_x REAL,
+                    sticker_y REAL,
+                    sticker_w REAL,
+                    sticker_h REAL,
+                    product_x REAL,
+                    product_y REAL,
+                    product_w REAL,
+                    product_h REAL,
                     frame_path TEXT
                 )
             """)
             
+            # Databases created before the bbox columns were split still
+            # need them added
+            cursor.execute("PRAGMA table_info(detections)")
+            existing_columns = {row[1] for row in cursor.fetchall()}
+            for column in _BBOX_COLUMNS:
+                if column not in existing_columns:
+                    cursor.execute(f"ALTER TABLE detections ADD COLUMN {column} REAL")
+            
+            # Backfill the split columns from the legacy JSON bbox columns
+            for prefix in ("sticker", "product"):
+                legacy_column = f"{prefix}_bbox"
+                if legacy_column not in existing_columns:
+                    continue
+                assignments = ", ".join(
+                    f"{prefix}_{key} = json_extract({legacy_column}, '$.{key}')"
+                    for key in _BBOX_KEYS
+                )
+                has_coordinates = " AND ".join(
+                    f"json_type({legacy_column}, '$.{key}') IN ('integer', 'real')"
+                    for key in _BBOX_KEYS
+                )
+                cursor.execute(f"""
+                    UPDATE detections SET {assignments}
+                    WHERE {prefix}_x IS NULL
+                      AND typeof({legacy_column}) = 'text'
+                      AND json_valid({legacy_column})
+                      AND {has_coordinates}
+                """)
+                cursor.execute(f"""
+                    SELECT COUNT(*) FROM detections
+                    WHERE {prefix}_x IS NULL AND {legacy_column} IS NOT NULL
+                """)
+                unconverted = cursor.fetchone()[0]
+                if unconverted:
+                    raise ValueError(
+                        f"{unconverted} detections have a {legacy_column} that is not "
+                        f"a JSON object with numeric {', '.join(_BBOX_KEYS)}; "
+                        "fix or clear them before upgrading"
+                    )
+            
             # Track video uploads
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS videos (
                     id TEXT PRIMARY KEY,
-                    upload_date DATETIME,
+                    upload_date DATETIME DEFAULT CURRENT_TIMESTAMP,
                     branch_location TEXT,
                     contributor_id TEXT,
                     processed BOOLEAN DEFAULT FALSE,
                     frame_count INTEGER
-                )
+                ) WITHOUT ROWID
+            """)
+            
+            # Partial index so the unprocessed-video backlog is cheap to find
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_videos_unprocessed
+                ON videos(processed) WHERE processed = 0
             """)
             
             # Store prediction model performance
@@ -61,14 +251,95 @@ class DatabaseManager:
                 CREATE TABLE IF NOT EXISTS model_metrics (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     model_version TEXT,
-                    train_date DATETIME,
+                    train_date DATETIME DEFAULT CURRENT_TIMESTAMP,
                     accuracy FLOAT,
                     precision_recall JSON,
                     feature_importance JSON
                 )
             """)
             
-            conn.commit()
+            # Indexes for the hot filter/sort columns; date-only lookups use
+            # the leading date column of idx_det_group below
+            cursor.execute("DROP INDEX IF EXISTS idx_det_date")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_det_cat_date ON detections(product_category, date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_det_branch_date ON detections(location_branch, date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_det_timestamp ON detections(timestamp DESC)")
+            
+            # Covering index for get_training_data grouping
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_det_group ON detections(
+                    date, product_id, product_category, day_of_week, hour_of_day,
+                    location_branch, product_name
+                )
+            """)
+            
+            # Per-category detection counts, maintained by triggers so
+            # get_stats does not have to scan detections
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_counts'"
+            )
+            backfill_category_counts = cursor.fetchone() is None
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS category_counts (
+                    product_category TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            if backfill_category_counts:
+                cursor.execute("""
+                    INSERT INTO category_counts (product_category, count)
+                    SELECT product_category, COUNT(*)
+                    FROM detections
+                    WHERE product_category IS NOT NULL
+                    GROUP BY product_category
+                """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_det_category_ins
+                AFTER INSERT ON detections
+                WHEN NEW.product_category IS NOT NULL
+                BEGIN
+                    INSERT INTO category_counts (product_category, count)
+                    VALUES (NEW.product_category, 1)
+                    ON CONFLICT(product_category) DO UPDATE SET count = count + 1;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_det_category_del
+                AFTER DELETE ON detections
+                WHEN OLD.product_category IS NOT NULL
+                BEGIN
+                    UPDATE category_counts SET count = count - 1
+                    WHERE product_category = OLD.product_category;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_det_category_upd
+                AFTER UPDATE OF product_category ON detections
+                WHEN OLD.product_category IS NOT NEW.product_category
+                BEGIN
+                    UPDATE category_counts SET count = count - 1
+                    WHERE product_category = OLD.product_category;
+                    INSERT INTO category_counts (product_category, count)
+                    SELECT NEW.product_category, 1
+                    WHERE NEW.product_category IS NOT NULL
+                    ON CONFLICT(product_category) DO UPDATE SET count = count + 1;
+                END
+            """)
+            
+            # Spatial filtering on sticker position
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_det_sticker_xy ON detections(sticker_x, sticker_y)")
+            
+            # Partial index so distinct-product counts skip NULL rows
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_det_product_nonnull
+                ON detections(product_id) WHERE product_id IS NOT NULL
+            """)
+            
+            # Refresh planner statistics; analysis_limit bounds the cost on large tables
+            cursor.execute("PRAGMA analysis_limit=1000")
+            cursor.execute("ANALYZE")
+            
+            cursor.execute("COMMIT")
     
     def add_detection(self, 
                      video_id: str,
@@ -84,114 +355,148 @@ class DatabaseManager:
                      sticker_bbox: Optional[Dict] = None,
                      product_bbox: Optional[Dict] = None,
                      frame_path: Optional[str] = None) -> int:
-        """Add a new detection record."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Add a new detection record.
+        
+        sticker_bbox and product_bbox are dicts with keys x, y, w and h;
+        any other shape raises ValueError.
+        """
+        sticker_params = _bbox_params(sticker_bbox)
+        product_params = _bbox_params(product_bbox)
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO detections (
-                    video_id, frame_number, product_id, product_name, 
-                    product_category, confidence, location_branch,
-                    day_of_week, hour_of_day, date, sticker_bbox,
-                    product_bbox, frame_path
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            cursor.execute(_INSERT_DETECTION_SQL, (
                 video_id, frame_number, product_id, product_name,
                 product_category, confidence, location_branch,
                 day_of_week, hour_of_day, date,
-                json.dumps(sticker_bbox) if sticker_bbox else None,
-                json.dumps(product_bbox) if product_bbox else None,
+                *sticker_params,
+                *product_params,
                 frame_path
             ))
-            conn.commit()
             return cursor.lastrowid
     
+    def add_detections_bulk(self, rows: List[Dict]) -> int:
+        """Add many detection records in a single transaction.
+        
+        Each row is a dict with the same keys as add_detection's arguments.
+        The batch is bound as one JSON parameter and unpacked by SQLite.
+        Returns the number of rows inserted.
+        """
+        if not rows:
+            return 0
+        for row in rows:
+            _check_bbox(row.get("sticker_bbox"))
+            _check_bbox(row.get("product_bbox"))
+        
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(_INSERT_DETECTIONS_JSON_SQL, (json.dumps(rows),))
+            inserted = cursor.rowcount
+            cursor.execute("COMMIT")
+            return inserted
+    
     def add_video(self, 
                 video_id: str,
                 branch_location: str,
                 contributor_id: str,
                 frame_count: int = 0) -> None:
         """Add a new video record."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO videos (
-                    id, upload_date, branch_location, contributor_id, frame_count
-                ) VALUES (?, ?, ?, ?, ?)
-            """, (video_id, datetime.now(), branch_location, contributor_id, frame_count))
-            conn.commit()
+            cursor.execute(_INSERT_VIDEO_SQL, (video_id, branch_location, contributor_id, frame_count))
     
     def mark_video_processed(self, video_id: str) -> None:
         """Mark a video as processed."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE videos SET processed = TRUE WHERE id = ?
-            """, (video_id,))
-            conn.commit()
+            cursor.execute(_MARK_VIDEO_PROCESSED_SQL, (video_id,))
+    
+    def _iter_rows(self, query: str, params: Sequence) -> Iterator[Dict]:
+        """Stream query results as dicts, fetching in cursor.arraysize batches.
+        
+        Each iterator reads through its own short-lived connection, closed
+        once the iterator is exhausted, closed or garbage-collected. Until
+        then it holds a WAL read snapshot, which delays checkpoints, so
+        consume or close() long-lived iterators promptly.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.arraysize = _FETCH_BATCH_SIZE
+            cursor.execute(query, params)
+            columns = [col[0] for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(columns, row))
+        finally:
+            conn.close()
     
     def get_detections(self, 
                       start_date: Optional[str] = None,
                       end_date: Optional[str] = None,
                       product_category: Optional[str] = None,
                       location_branch: Optional[str] = None,
-                      limit: int = 1000) -> List[Dict]:
-        """Query detections with optional filters."""
-        query = "SELECT * FROM detections WHERE 1=1"
+                      limit: int = 1000) -> Iterator[Dict]:
+        """Query detections with optional filters, yielding rows lazily."""
+        query = f"SELECT {', '.join(_DETECTION_COLUMNS)} FROM detections WHERE 1=1"
         params = []
         
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
+        # Each filter combination builds its own SQL string. There are at
+        # most 16, well within sqlite3's default statement cache, and unlike a
+        # catch-all "? IS NULL OR ..." template this lets the planner use the
+        # matching composite index.
+        # Equality predicates first, date range last
         if product_category:
             query += " AND product_category = ?"
             params.append(product_category)
         if location_branch:
             query += " AND location_branch = ?"
             params.append(location_branch)
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
         
         query += " ORDER BY timestamp DESC LIMIT ?"
         params.append(limit)
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+        return (_decode_detection(row) for row in self._iter_rows(query, params))
     
     def get_training_data(self, 
                          start_date: str,
                          end_date: str,
-                         min_samples: int = 100) -> List[Dict]:
-        """Get historical data for model training."""
-        query = """
-            SELECT 
-                product_id, product_name, product_category,
-                day_of_week, hour_of_day, date, location_branch,
-                COUNT(*) as detection_count
-            FROM detections 
-            WHERE date BETWEEN ? AND ?
-            GROUP BY product_id, product_name, product_category, 
-                     day_of_week, hour_of_day, date, location_branch
-            HAVING COUNT(*) >= ?
-            ORDER BY date DESC
-        """
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(query, (start_date, end_date, min_samples))
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+                         min_samples: int = 100) -> Iterator[Dict]:
+        """Get historical data for model training, yielding rows lazily."""
+        return self._iter_rows(_TRAINING_DATA_SQL, (start_date, end_date, min_samples))
+    
+    def get_training_dataframe(self,
+                               start_date: str,
+                               end_date: str,
+                               min_samples: int = 100) -> pd.DataFrame:
+        """Get historical training data as a typed DataFrame."""
+        with self._lock:
+            return pd.read_sql_query(
+                _TRAINING_DATA_SQL,
+                self._conn,
+                params=(start_date, end_date, min_samples),
+                parse_dates=["date"],
+                dtype={
+                    "day_of_week": "Int8",
+                    "hour_of_day": "Int8",
+                    "detection_count": "int32"
+                }
+            )
     
     def get_video_status(self, video_id: str) -> Optional[Dict]:
         """Get video processing status."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM videos WHERE id = ?", (video_id,))
             row = cursor.fetchone()
             return dict(row) if row else None
@@ -202,55 +507,68 @@ class DatabaseManager:
                          precision_recall: Dict,
                          feature_importance: Dict) -> None:
         """Add model performance metrics."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO model_metrics (
                     model_version, train_date, accuracy, 
                     precision_recall, feature_importance
-                ) VALUES (?, ?, ?, ?, ?)
+                ) VALUES (?, CURRENT_TIMESTAMP, ?, ?, ?)
             """, (
-                model_version, datetime.now(), accuracy,
+                model_version, accuracy,
                 json.dumps(precision_recall),
                 json.dumps(feature_importance)
             ))
-            conn.commit()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get system statistics."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
-            # Total detections
-            cursor.execute("SELECT COUNT(*) FROM detections")
-            total_detections = cursor.fetchone()[0]
-            
-            # Total videos
-            cursor.execute("SELECT COUNT(*) FROM videos")
-            total_videos = cursor.fetchone()[0]
+            # Read every count from one snapshot so concurrent writers from
+            # other processes cannot skew them against each other
+            cursor.execute("BEGIN")
             
-            # Processed videos
-            cursor.execute("SELECT COUNT(*) FROM videos WHERE processed = TRUE")
-            processed_videos = cursor.fetchone()[0]
+            # Total and unprocessed videos; the subquery reads the partial
+            # idx_videos_unprocessed index
+            cursor.execute("""
+                SELECT COUNT(*),
+                       (SELECT COUNT(*) FROM videos WHERE processed = 0)
+                FROM videos
+            """)
+            total_videos, unprocessed_videos = cursor.fetchone()
+            processed_videos = total_videos - unprocessed_videos
             
-            # Unique products detected
-            cursor.execute("SELECT COUNT(DISTINCT product_id) FROM detections WHERE product_id IS NOT NULL")
-            unique_products = cursor.fetchone()[0]
+            # Total detections and unique products; the distinct count reads
+            # the partial idx_det_product_nonnull index
+            cursor.execute("""
+                SELECT (SELECT COUNT(*) FROM detections),
+                       (SELECT COUNT(DISTINCT product_id) FROM detections
+                        WHERE product_id IS NOT NULL)
+            """)
+            total_detections, unique_products = cursor.fetchone()
             
             # Detections by category
             cursor.execute("""
-                SELECT product_category, COUNT(*) as count 
-                FROM detections 
-                WHERE product_category IS NOT NULL 
-                GROUP BY product_category 
+                SELECT product_category, count 
+                FROM category_counts 
+                WHERE count > 0 
                 ORDER BY count DESC
             """)
             category_stats = dict(cursor.fetchall())
             
+            cursor.execute("COMMIT")
+            
             return {
                 "total_detections": total_detections,
                 "total_videos": total_videos,
                 "processed_videos": processed_videos,
+                "unprocessed_videos": unprocessed_videos,
                 "unique_products": unique_products,
                 "category_stats": category_stats
             }
+    
+    def close(self) -> None:
+        """Close the shared database connection."""
+        with self._lock:
+            self._conn.close()